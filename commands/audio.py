@@ -1,5 +1,6 @@
 import typer
-from lib.ffmpeg.extract_wav_from_video import extract_wav_from_video
+from typing import List
+from lib.ffmpeg.extract_wav_from_video import extract_wav_from_video, extract_wav_from_videos
 from rich import print
 
 
@@ -13,4 +14,19 @@ def extract_audio(input: str, output: str):
       print("[bold green]Extract Audio: [/bold green] 🥳 🎉", wav_file)   
     except Exception as e:
         print("[bold red] ❌ extract_audio error: [/bold red]", e)
-        raise typer.Exit(code=1)    
\ No newline at end of file
+        raise typer.Exit(code=1)
+
+
+@app.command("extract-audio-batch")
+def extract_audio_batch(
+    inputs: List[str],
+    output: str,
+    parallel: int = typer.Option(0, "--parallel", "-p", help="Run up to N ffmpeg processes at once instead of one process for all inputs"),
+):
+    """Extract audio from several videos and save them to the output directory"""
+    try:
+        wav_files = extract_wav_from_videos(inputs, output, parallel)
+        print("[bold green]Extract Audio: [/bold green] 🥳 🎉", ", ".join(wav_files))
+    except Exception as e:
+        print("[bold red] ❌ extract_audio_batch error: [/bold red]", e)
+        raise typer.Exit(code=1)
@@ -1,6 +1,8 @@
+import os
 import typer
-from lib.aws.aws_transcript import process_audio_file_with_aws
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from lib.ffmpeg.extract_wav_from_video import extract_wav_from_video
+from lib.list_video_files import list_video_files
 from rich import print
 
 app = typer.Typer()
@@ -17,11 +19,73 @@ def extract_audio(input: str, output: str):
 
 
 @app.command("extract-audio-aws")
-def extract_audio_aws(input: str, output: str, s3: str):
+def extract_audio_aws(
+    input: str,
+    output: str,
+    s3: str,
+    stream: bool = typer.Option(False, "--stream", help="Pipe audio from ffmpeg straight to S3 without writing a local WAV"),
+):
     # """Extract audio from video and upload to AWS for transcription"""
     try:
+        # Imported here so boto3 only loads for the commands that talk to AWS
+        from lib.aws.aws_transcript import process_audio_file_with_aws, process_video_stream_with_aws
+        if stream:
+            process_video_stream_with_aws(input, output, s3)
+            return
         wav_file = extract_wav_from_video(input, output)
         process_audio_file_with_aws(wav_file, output, s3, input)
     except Exception as e:
         print("[bold red] ❌ extract_audio_aws error: [/bold red]", e)
         raise typer.Exit(code=1)
+
+
+@app.command("batch-extract-audio-aws")
+def batch_extract_audio_aws(input_dir: str, output: str, s3: str):
+    """Extract audio from every video in a directory and upload each to AWS for transcription"""
+    try:
+        # Imported here so boto3 only loads for the commands that talk to AWS
+        from lib.aws.aws_transcript import process_audio_file_with_aws
+        videos = list_video_files(input_dir)
+    except Exception as e:
+        print("[bold red] ❌ batch_extract_audio_aws error: [/bold red]", e)
+        raise typer.Exit(code=1)
+
+    # Output directories, WAVs and S3 keys are all named after the stem, so e.g.
+    # ep1.mp4 and ep1.mkv would overwrite each other; compared case-insensitively
+    # since EP1.mkv lands in the same directory on macOS and Windows
+    stems = {}
+    for video in videos:
+        stems.setdefault(os.path.splitext(os.path.basename(video))[0].casefold(), []).append(video)
+    duplicates = [", ".join(paths) for paths in stems.values() if len(paths) > 1]
+    if duplicates:
+        print("[bold red] ❌ batch_extract_audio_aws error: videos share a name: [/bold red]", "; ".join(duplicates))
+        raise typer.Exit(code=1)
+
+    failed = 0
+
+    # ffmpeg extracts the next video while earlier ones upload and transcribe
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pending = {}
+        for video in videos:
+            # Each video gets its own directory since the output file names are fixed
+            video_output = os.path.join(output, os.path.splitext(os.path.basename(video))[0], "")
+            os.makedirs(video_output, exist_ok=True)
+            try:
+                wav_file = extract_wav_from_video(video, video_output)
+            except Exception as e:
+                print(f"[bold red] ❌ batch_extract_audio_aws error ({video}): [/bold red]", e)
+                failed += 1
+                continue
+            pending[pool.submit(process_audio_file_with_aws, wav_file, video_output, s3, video)] = video
+
+        for future in as_completed(pending):
+            video = pending[future]
+            try:
+                future.result()
+                print("[bold green]Transcribed: [/bold green] 🥳 🎉", video)
+            except Exception as e:
+                print(f"[bold red] ❌ batch_extract_audio_aws error ({video}): [/bold red]", e)
+                failed += 1
+
+    if failed:
+        raise typer.Exit(code=1)
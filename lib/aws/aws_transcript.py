@@ -1,39 +1,192 @@
 # https://docs.aws.amazon.com/transcribe/
+import io
 import json
-import tempfile
+import hashlib
 import boto3
 import time
-import urllib.parse
 import os
+import uuid
+import threading
+from functools import lru_cache
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from s3transfer.utils import ChunksizeAdjuster
 from rich import print
 
-from lib.aws.transcript_json_to_srt import convert_to_srt
+from lib.aws.transcript_json_to_srt import iter_srt_blocks
 from lib.ffmpeg.add_subtitles_to_video import add_subtitles_to_video
+from lib.ffmpeg.extract_wav_from_video import stream_audio_from_video
 
+# orjson parses large transcripts several times faster; it's optional
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-def upload_file_to_s3(local_file_path: str, bucket_name: str, s3_file_name: str):
-    s3_client = boto3.client('s3')
-    file = s3_client.upload_file(local_file_path, bucket_name, s3_file_name)
+# Transcription job polling, in seconds
+POLL_INITIAL_DELAY = 2.0
+POLL_MAX_DELAY = 30.0
+POLL_BACKOFF = 1.5
+FINISHED_JOB_STATUSES = frozenset({'COMPLETED', 'FAILED'})
+
+# Multipart settings for large WAV uploads: bigger parts, more of them in flight
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MB,
+    multipart_chunksize=16 * MB,
+    max_concurrency=10,
+    io_chunksize=1 * MB,
+    use_threads=True,
+)
+
+# Streamed uploads buffer each part in memory, so keep parts smaller
+STREAM_TRANSFER_CONFIG = TransferConfig(
+    multipart_chunksize=8 * MB,
+    max_concurrency=10,
+    use_threads=True,
+)
+
+# Retry throttling, 5xx and connection errors with exponential backoff instead of
+# failing a long batch on one transient error
+CLIENT_CONFIG = Config(retries={'mode': 'standard', 'total_max_attempts': 5})
+
+# The S3 client is shared by every transfer thread, including the batch command's
+# parallel uploads; botocore's default pool of 10 would drop and reopen connections
+S3_CLIENT_CONFIG = CLIENT_CONFIG.merge(Config(max_pool_connections=32))
+
+
+# boto3's default session isn't thread-safe, and lru_cache lets two threads miss at
+# once, so clients first requested from the batch workers are created one at a time
+_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _s3():
+    with _client_lock:
+        return boto3.client('s3', config=S3_CLIENT_CONFIG)
+
+@lru_cache(maxsize=None)
+def _transcribe():
+    with _client_lock:
+        return boto3.client('transcribe', config=CLIENT_CONFIG)
+
+
+def local_s3_etag(local_file_path: str):
+    """
+    ETag S3 will report for the file once uploaded with TRANSFER_CONFIG: the MD5 for
+    single-part uploads, or the MD5 of the part MD5s plus a part count for multipart.
+    """
+    size = os.path.getsize(local_file_path)
+    multipart = size >= TRANSFER_CONFIG.multipart_threshold
+    part_size = ChunksizeAdjuster().adjust_chunksize(TRANSFER_CONFIG.multipart_chunksize, size) if multipart else size
+
+    part_md5s = []
+    with open(local_file_path, 'rb') as file:
+        while True:
+            md5 = hashlib.md5()
+            remaining = part_size
+            while remaining > 0:
+                block = file.read(min(MB, remaining))
+                if not block:
+                    break
+                md5.update(block)
+                remaining -= len(block)
+            if remaining == part_size:
+                break
+            part_md5s.append(md5)
+
+    if not multipart:
+        return part_md5s[0].hexdigest() if part_md5s else hashlib.md5().hexdigest()
+    combined = hashlib.md5(b''.join(md5.digest() for md5 in part_md5s))
+    return f'{combined.hexdigest()}-{len(part_md5s)}'
+
+def _s3_etag(bucket_name: str, s3_file_name: str):
+    try:
+        head = _s3().head_object(Bucket=bucket_name, Key=s3_file_name)
+    except ClientError:
+        # Missing object (404) or no permission to look (403): just upload
+        return None
+    return head['ETag'].strip('"')
+
+def upload_file_to_s3(local_file_path: str, bucket_name: str, s3_file_name: str, etag: str = None):
+    file_uri = f's3://{bucket_name}/{s3_file_name}'
+    if etag is not None and _s3_etag(bucket_name, s3_file_name) == etag:
+        print("[green] ✅ Identical file already in S3, skipping upload [/green]")
+        return file_uri
+    _s3().upload_file(local_file_path, bucket_name, s3_file_name, Config=TRANSFER_CONFIG)
+    return file_uri
+
+def _split_s3_uri(s3_uri: str):
+    bucket_name, _, key = s3_uri[len('s3://'):].partition('/')
+    return bucket_name, key
+
+def download_from_s3(s3_uri: str):
+    bucket_name, key = _split_s3_uri(s3_uri)
+    buffer = io.BytesIO()
+    # Large objects are fetched as parallel ranged GETs
+    _s3().download_fileobj(bucket_name, key, buffer, Config=TRANSFER_CONFIG)
+    return buffer.getvalue()
+
+def upload_fileobj_to_s3(fileobj, bucket_name: str, s3_file_name: str):
+    _s3().upload_fileobj(fileobj, bucket_name, s3_file_name, Config=STREAM_TRANSFER_CONFIG)
     return f's3://{bucket_name}/{s3_file_name}'
 
-def transcribe_audio(file_uri, transcribe_client):    
-    job_name = "TranscriptionJob_" + str(int(time.time()))
-    transcribe_client.start_transcription_job(
-        TranscriptionJobName=job_name,
-        Media={'MediaFileUri': file_uri},
-        MediaFormat='wav', 
-        LanguageCode='en-US'
-    )
+def _transcription_job_status(transcribe_client, job_name: str):
+    try:
+        job = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+    except transcribe_client.exceptions.BadRequestException:
+        return None
+    return job['TranscriptionJob']['TranscriptionJobStatus']
+
+def transcribe_audio(file_uri, transcribe_client, media_format='wav', job_name=None):    
+    """
+    Transcribe the audio at file_uri and return the s3:// URI of the transcript JSON,
+    which Transcribe writes next to the audio in the same bucket
+    """
+    if job_name is None:
+        # Random suffix keeps jobs started within the same second from colliding
+        job_name = "TranscriptionJob_" + str(int(time.time())) + "_" + uuid.uuid4().hex[:8]
+        existing_status = None
+    else:
+        existing_status = _transcription_job_status(transcribe_client, job_name)
+
+    bucket_name, _ = _split_s3_uri(file_uri)
+    transcript_key = f'transcripts/{job_name}.json'
+
+    if existing_status in ['QUEUED', 'IN_PROGRESS', 'COMPLETED']:
+        print(f"Reusing transcription job {job_name}")
+    else:
+        if existing_status == 'FAILED':
+            transcribe_client.delete_transcription_job(TranscriptionJobName=job_name)
+        transcribe_client.start_transcription_job(
+            TranscriptionJobName=job_name,
+            Media={'MediaFileUri': file_uri},
+            MediaFormat=media_format, 
+            LanguageCode='en-US',
+            OutputBucketName=bucket_name,
+            OutputKey=transcript_key,
+        )
 
+    # Poll with exponential backoff: short clips finish quickly, long ones
+    # don't need a status check every few seconds.
+    get_transcription_job = transcribe_client.get_transcription_job
+    delay = POLL_INITIAL_DELAY
     while True:
-        status = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
-        if status['TranscriptionJob']['TranscriptionJobStatus'] in ['COMPLETED', 'FAILED']:
+        job = get_transcription_job(TranscriptionJobName=job_name)['TranscriptionJob']
+        job_status = job['TranscriptionJobStatus']
+        if job_status in FINISHED_JOB_STATUSES:
             break
         print("Not ready yet...")
-        time.sleep(5)
+        time.sleep(delay)
+        delay = min(POLL_MAX_DELAY, delay * POLL_BACKOFF)
+
+    if job_status == 'FAILED':
+        raise RuntimeError(f"Transcription job {job_name} failed: {job.get('FailureReason')}")
 
     print("Transcription finished")
-    return status['TranscriptionJob']['Transcript']['TranscriptFileUri']
+    return f's3://{bucket_name}/{transcript_key}'
 
 def process_audio_file_with_aws(local_file_path: str, outputDir: str, bucket_name: str, video_file_path: str):
     print("[yellow] 🎵 Processing audio file with AWS Transcript...[/yellow]")
@@ -42,45 +195,60 @@ def process_audio_file_with_aws(local_file_path: str, outputDir: str, bucket_nam
     
     s3_file_name = os.path.basename(local_file_path)
 
-    # Upload the local file to S3
-    s3_file_name_str = str(s3_file_name)
-    bucket_name_str = str(bucket_name)
-    file_uri = upload_file_to_s3(local_file_path, bucket_name_str, s3_file_name_str)
+    # Upload the local file to S3, unless an identical copy is already there
+    etag = local_s3_etag(local_file_path)
+    file_uri = upload_file_to_s3(local_file_path, bucket_name, s3_file_name, etag)
     print(f"[green]File uploaded to S3: {file_uri}[/green]")
 
-    transcribe_client = boto3.client('transcribe')
-    transcript_uri = transcribe_audio(file_uri, transcribe_client)
-    
-    # # Fetch and print the transcript
-    transcript = urllib.request.urlopen(transcript_uri).read().decode('utf-8')
-    
-    print("[green] 🪣 ✅ Transcript:", transcript)
-# Create a named temporary file to store the JSON transcript data
-    with tempfile.NamedTemporaryFile(mode='w+', delete=False) as tempFileJson:
-        # Write the transcript data to the temporary file
-        tempFileJson.write(json.dumps(transcript, indent=4))
-        tempFileName = tempFileJson.name
+    # Naming the job after the content lets re-runs pick up a previous transcription;
+    # the bucket is part of the name because that's where the job wrote its transcript
+    job_name = f"TranscriptionJob_{bucket_name}_{etag}"
+    subtitle_video_from_s3_audio(file_uri, 'wav', outputDir, video_file_path, job_name)
+
+def process_video_stream_with_aws(video_file_path: str, outputDir: str, bucket_name: str):
+    """
+    Stream the video's audio from ffmpeg straight into S3 without writing it to disk
+    """
+    print("[yellow] 🎵 Streaming audio to AWS Transcript...[/yellow]")
+    print("[yellow] 📁 Video filepath: [/yellow]", video_file_path)
+    print("[yellow] 🪣 Bucket name: [/yellow]", bucket_name)
+
+    s3_file_name = os.path.splitext(os.path.basename(video_file_path))[0] + '.flac'
 
-    print("[green] ✅ Transcripts written to temporary file [/green]")
+    # Multipart upload pulls parts from ffmpeg's stdout as they are encoded
+    process = stream_audio_from_video(video_file_path)
+    try:
+        file_uri = upload_fileobj_to_s3(process.stdout, bucket_name, s3_file_name)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        # The upload still completes with whatever ffmpeg wrote before failing
+        _s3().delete_object(Bucket=bucket_name, Key=s3_file_name)
+        raise RuntimeError(f"ffmpeg exited with code {returncode} while streaming audio")
+    print(f"[green]File uploaded to S3: {file_uri}[/green]")
 
-    # Convert the transcript to SRT format
-    data = json.loads(transcript)
-    srt_content = convert_to_srt(data)
+    subtitle_video_from_s3_audio(file_uri, 'flac', outputDir, video_file_path)
 
-    print("[green] ✅ Converted to SRT format [/green]") 
+def subtitle_video_from_s3_audio(file_uri: str, media_format: str, outputDir: str, video_file_path: str, job_name: str = None):
+    transcript_uri = transcribe_audio(file_uri, _transcribe(), media_format, job_name)
     
-    # Delete the temporary JSON file
-    os.remove(tempFileName)
+    # Fetch the transcript from our own bucket rather than over the public internet
+    transcript = download_from_s3(transcript_uri)
     
-    print("[green] ✅ Deleted temporary file [/green]")
+    print(f"[green] 🪣 ✅ Transcript fetched ({len(transcript)} bytes)[/green]")
+
+    # Parse the transcript, both parsers accept the raw bytes
+    data = _json_loads(transcript)
 
     outputDirSrtFile = outputDir + 'video_subtitles.srt'
     
     print("[green] ✅ Output directory: ", outputDirSrtFile)
     
-    # Save the SRT file to disk in the same directory as the input file    
-    with open(outputDirSrtFile, 'w') as file:
-        file.write(srt_content)
-        
-        
+    # Convert to SRT and save it block by block in the same directory as the input file
+    with open(outputDirSrtFile, 'w', encoding='utf-8') as file:
+        file.writelines(iter_srt_blocks(data))
+
+    print("[green] ✅ Converted to SRT format [/green]") 
+
     add_subtitles_to_video(video_file_path, outputDirSrtFile, outputDir)
\ No newline at end of file
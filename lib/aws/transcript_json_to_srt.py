@@ -1,24 +1,30 @@
-def convert_to_srt(transcript_data: dict):
-    """Convert AWS Transcribe JSON to SRT format."""
-    srt_string = ''
+# Bound once; %-formatting fixed-width ints is cheaper than an f-string per call
+_TIMESTAMP_FORMAT = '%02d:%02d:%02d,%03d'.__mod__
+
+
+def _format_timestamp(seconds: float):
+    """Format seconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    ms = round(seconds * 1000)
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return _TIMESTAMP_FORMAT((h, m, s, ms))
+
+
+def iter_srt_blocks(transcript_data: dict):
+    """Yield the SRT blocks for AWS Transcribe JSON one at a time."""
+    items = transcript_data['results']['items']
     counter = 1
 
-    for item in transcript_data['results']['items']:
-        if item['type'] == 'pronunciation':
-            start_time = float(item['start_time'])
-            end_time = float(item['end_time'])
-            content = item['alternatives'][0]['content']
-
-            # Format the timestamps
-            start_timestamp = '{:02}:{:02}:{:02},{:03}'.format(
-                int(start_time // 3600), int(start_time % 3600 // 60),
-                int(start_time % 60), int(start_time % 1 * 1000))
-            end_timestamp = '{:02}:{:02}:{:02},{:03}'.format(
-                int(end_time // 3600), int(end_time % 3600 // 60),
-                int(end_time % 60), int(end_time % 1 * 1000))
-
-            # Append to the SRT string
-            srt_string += f'{counter}\n{start_timestamp} --> {end_timestamp}\n{content}\n\n'
-            counter += 1
-
-    return srt_string
+    for item in (i for i in items if i['type'] == 'pronunciation'):
+        start_timestamp = _format_timestamp(float(item['start_time']))
+        end_timestamp = _format_timestamp(float(item['end_time']))
+        content = item['alternatives'][0]['content']
+
+        yield f'{counter}\n{start_timestamp} --> {end_timestamp}\n{content}\n\n'
+        counter += 1
+
+
+def convert_to_srt(transcript_data: dict):
+    """Convert AWS Transcribe JSON to SRT format."""
+    return ''.join(iter_srt_blocks(transcript_data))
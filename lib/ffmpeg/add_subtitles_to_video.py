@@ -1,12 +1,32 @@
+import os
 import subprocess
-import ffmpeg
+import tempfile
 from rich import print
+from rich.markup import escape
+
+# Subtitle codec per output container: MKV carries the SRT as-is,
+# MP4/MOV need it converted to mov_text and WebM to WebVTT
+SUBTITLE_CODECS = {".mkv": "copy", ".mp4": "mov_text", ".mov": "mov_text", ".webm": "webvtt"}
+DEFAULT_CONTAINER = ".mp4"
 
 def add_subtitles_to_video(input_video, input_subtitle, outputDir):
-    try:
-        output_video = outputDir + "video_subtitle.mp4" 
-        command = f"ffmpeg -i {input_video} -i {input_subtitle} -c copy -scodec mov_text {output_video} -y"
-        subprocess.run(command, shell=True, check=True)
-        print("Subtitles added successfully.")
-    except ffmpeg.Error as e:
-        print("[bold red] ❌ add_subtitles_to_video error: [/bold red]", e)
+    # ffmpeg only reports errors; they are captured and shown if it fails
+    with tempfile.TemporaryFile() as stderr_buffer:
+        try:
+            # Keep the input's container so the subtitles can be copied instead of re-encoded when possible
+            container = os.path.splitext(input_video)[1].lower()
+            if container not in SUBTITLE_CODECS:
+                container = DEFAULT_CONTAINER
+            output_video = outputDir + "video_subtitle" + container
+            command = [
+                "ffmpeg", "-nostdin", "-hide_banner", "-nostats", "-loglevel", "error",
+                "-i", input_video, "-i", input_subtitle,
+                "-c", "copy", "-scodec", SUBTITLE_CODECS[container], output_video, "-y",
+            ]
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=stderr_buffer)
+            print("Subtitles added successfully.")
+        except subprocess.CalledProcessError as e:
+            stderr_buffer.seek(0)
+            print("[bold red] ❌ add_subtitles_to_video error: [/bold red]", e)
+            print(escape(stderr_buffer.read().decode("utf-8", "replace")))
+            raise
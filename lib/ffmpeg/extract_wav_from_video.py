@@ -2,6 +2,17 @@ import os
 import ffmpeg
 from rich import print
 
+def _quiet(stream):
+  # Only errors reach the terminal; ffmpeg's banner and progress stats are dropped.
+  # -nostdin keeps ffmpeg off the tty, so side-by-side runs can't leave echo off
+  # or take the user's keypresses
+  return stream.global_args('-nostdin', '-hide_banner', '-nostats', '-loglevel', 'error')
+
+def _wav_output_path(input: str, output: str):
+  input_filename = os.path.basename(input)
+  output_filename = os.path.splitext(input_filename)[0] + ".wav"
+  return os.path.join(output, output_filename)
+
 def extract_wav_from_video(input: str, output: str):
   try:
     """
@@ -9,15 +20,76 @@ def extract_wav_from_video(input: str, output: str):
     """
     print("Extracting audio with best quality from video...")
     
-    input_filename = os.path.basename(input)
-    output_filename = os.path.splitext(input_filename)[0] + ".wav"
-    output_path = os.path.join(output, output_filename)
+    output_path = _wav_output_path(input, output)
 
     stream = ffmpeg.input(input)
     stream = ffmpeg.output(stream, output_path, audio_bitrate=0, map='a')
-    ffmpeg.run(stream)
+    ffmpeg.run(_quiet(stream), overwrite_output=True)
     
     return output_path
   except ffmpeg.Error as e:
-    print("[bold red]extract_wav_from_video error: [/bold red]", e.stderr)
-    raise e
\ No newline at end of file
+    print("[bold red]extract_wav_from_video error: [/bold red]", e)
+    raise e
+
+
+def extract_wav_from_videos(inputs: list, output: str, parallel: int = 0):
+  """
+  Extract audio from several videos into WAV files in the output directory.
+  By default a single ffmpeg process handles every input; with parallel > 0
+  up to that many ffmpeg processes run side by side instead.
+  """
+  print(f"Extracting audio with best quality from {len(inputs)} videos...")
+
+  output_paths = [_wav_output_path(input, output) for input in inputs]
+
+  # Same-named videos from different directories would write to one WAV;
+  # case-insensitively so, on macOS and Windows filesystems
+  seen = {}
+  for input, output_path in zip(inputs, output_paths):
+    key = output_path.casefold()
+    if key in seen:
+      raise ValueError(f"{seen[key]} and {input} would both be extracted to {output_path}")
+    seen[key] = input
+
+  if parallel <= 0:
+    try:
+      # One input and one mapped output per video, sharing a single ffmpeg start-up
+      streams = [
+        ffmpeg.input(input).audio.output(output_path, audio_bitrate=0)
+        for input, output_path in zip(inputs, output_paths)
+      ]
+      ffmpeg.run(_quiet(ffmpeg.merge_outputs(*streams)), overwrite_output=True)
+      return output_paths
+    except ffmpeg.Error as e:
+      print("[bold red]extract_wav_from_videos error: [/bold red]", e)
+      raise e
+
+  failed = []
+  running = []
+  for input, output_path in zip(inputs, output_paths):
+    if len(running) >= parallel:
+      _wait_for_extract(running.pop(0), failed)
+    stream = ffmpeg.input(input).audio.output(output_path, audio_bitrate=0)
+    running.append((input, ffmpeg.run_async(_quiet(stream), overwrite_output=True)))
+  for job in running:
+    _wait_for_extract(job, failed)
+
+  if failed:
+    raise RuntimeError("ffmpeg failed to extract audio from: " + ", ".join(failed))
+  return output_paths
+
+
+def _wait_for_extract(job, failed: list):
+  input, process = job
+  if process.wait() != 0:
+    failed.append(input)
+
+
+def stream_audio_from_video(input: str, format: str = 'flac'):
+  """
+  Start ffmpeg encoding the audio of a video to its stdout and return the running process.
+  WAV can't be used here since its header sizes are only patched in on a seekable output.
+  """
+  stream = ffmpeg.input(input)
+  stream = ffmpeg.output(stream, 'pipe:', format=format, map='a')
+  return ffmpeg.run_async(_quiet(stream), pipe_stdout=True)
@@ -1,6 +1,5 @@
 # https://pypi.org/project/google-cloud-speech/
 
-import json
 from google.cloud import speech_v1p1beta1 as speech
 
 def google_speech_to_text(inputFile: str):
@@ -26,9 +25,10 @@ def google_speech_to_text(inputFile: str):
   print("Waiting for operation to complete...")
   response = client.recognize(config=config, audio=audio)
   print("Operation complete", response)
-  data = json.loads(response)
+  # The response is a protobuf message, not JSON text
+  transcript_json = speech.RecognizeResponse.to_json(response)
   with open('transcripts.json', 'w') as file:
-    file.write(response)
+    file.write(transcript_json)
     print("[green] Transcripts saved to transcripts.json [/green]")
 
 
@@ -56,13 +56,19 @@ def generate_srt(transcript_text, output_srt_file):
 
                 sequence_number += 1  # Increment sequence number
 
-# Example usage:
-transcript_text = """
+
+def main():
+    # Example usage:
+    transcript_text = """
 This is the first segment.
 This is the second segment.
 This is the third segment.
 """
 
-output_srt_file = "output.srt"
+    output_srt_file = "output.srt"
+
+    generate_srt(transcript_text, output_srt_file)
+
 
-generate_srt(transcript_text, output_srt_file)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
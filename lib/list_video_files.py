@@ -0,0 +1,17 @@
+import os
+
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mkv", ".mov", ".avi", ".webm"})
+
+def list_video_files(directory: str, extensions=VIDEO_EXTENSIONS):
+    """
+    Return the paths of video files directly inside directory, sorted by name.
+    os.scandir answers is_file() from the directory listing itself, so no
+    per-entry stat() is needed on most filesystems.
+    """
+    with os.scandir(directory) as entries:
+        videos = [
+            entry.path
+            for entry in entries
+            if os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file()
+        ]
+    return sorted(videos)